@@ -0,0 +1,81 @@
+# admission.py
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens refill per second up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def take(self, now=None):
+        """
+        Consume one token. Returns 0 on success, otherwise the number of
+        seconds until a token becomes available.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+    def idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """
+    Keyed collection of token buckets (one per bidder, one per crop, ...).
+    Buckets that have refilled completely are pruned so the map stays small.
+    """
+
+    def __init__(self, rate, capacity, prune_every=1024):
+        self.rate = rate
+        self.capacity = capacity
+        self.prune_every = prune_every
+        self._buckets = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            wait = bucket.take(now)
+
+            self._calls += 1
+            if self._calls >= self.prune_every:
+                self._calls = 0
+                for k in [k for k, b in self._buckets.items() if b.idle(now)]:
+                    del self._buckets[k]
+        return wait
+
+
+def admit(*checks):
+    """
+    Run (limiter, key) checks in order, stopping at the first rejection so a
+    request refused by one bucket does not drain the ones after it. Returns 0
+    when every limiter admits the request, otherwise the wait in seconds
+    (suitable for a Retry-After header). Put the narrowest limiter first.
+    """
+    for limiter, key in checks:
+        wait = limiter.take(key)
+        if wait:
+            return wait
+    return 0
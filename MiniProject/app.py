@@ -1,53 +1,137 @@
-from flask import Flask, request, jsonify, render_template, session, redirect
+from flask import Flask, Blueprint, current_app, request, jsonify, render_template, session, redirect
 from flask_cors import CORS
 from bson.objectid import ObjectId
 from datetime import datetime, timedelta
 import bcrypt
 import os
+import math
+import pymongo
 from flask_pymongo import PyMongo
 
 # Import CRUD functions from your module
 from crud import (
     get_user_by_email, create_user, get_crops, create_crop,
     update_crop, delete_crop, get_crop, get_highest_bid,
-    place_bid as crud_place_bid, get_auction_winner, db
+    place_bid as crud_place_bid, get_auction_winner, db,
+    ensure_indexes, warm_cache
 )
+from admission import RateLimiter, admit
+from bid_queue import BidQueues, PendingBid
+from assets import init_assets
+from uploads import UploadRequest, save_uploaded_files, save_data_urls
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+from startup import init_startup
+
+bp = Blueprint("main", __name__)
+mongo = PyMongo()
 
-app = Flask(__name__, static_folder='static', template_folder='templates')
 
-app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
-CORS(app, supports_credentials=True)
+def create_app(config=None):
+    """
+    Application factory. Nothing here waits on MongoDB: clients connect on
+    first use, and index checks plus cache warmup run in the background.
+    """
+    app = Flask(__name__, static_folder='static', template_folder='templates')
+    app.request_class = UploadRequest
+
+    app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
+    CORS(app, supports_credentials=True)
+
+    app.config["MONGO_URI"] = "mongodb://localhost:27017/crop_connect"
+
+    # Fingerprinted, pre-compressed static assets with long-lived caching
+    app.config["ASSETS_MAX_AGE"] = int(os.environ.get("ASSETS_MAX_AGE", 31536000))
+
+    # Upload limits: whole request body, each image, and images per request
+    app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_CONTENT_LENGTH", 25 * 1024 * 1024))
+    app.config["MAX_UPLOAD_FILE_SIZE"] = int(os.environ.get("MAX_UPLOAD_FILE_SIZE", 5 * 1024 * 1024))
+    app.config["MAX_UPLOAD_FILES"] = int(os.environ.get("MAX_UPLOAD_FILES", 5))
+
+    # Bid storm protection: token buckets (tokens/sec, burst) and queue depth per crop
+    app.config["BID_RATE_PER_BIDDER"] = float(os.environ.get("BID_RATE_PER_BIDDER", 2))
+    app.config["BID_BURST_PER_BIDDER"] = float(os.environ.get("BID_BURST_PER_BIDDER", 5))
+    app.config["BID_RATE_PER_CROP"] = float(os.environ.get("BID_RATE_PER_CROP", 50))
+    app.config["BID_BURST_PER_CROP"] = float(os.environ.get("BID_BURST_PER_CROP", 100))
+    app.config["BID_QUEUE_MAX_PENDING"] = int(os.environ.get("BID_QUEUE_MAX_PENDING", 64))
+    app.config["BID_COALESCE"] = os.environ.get("BID_COALESCE", "1") != "0"
+
+    # Background warmup: index checks and priming the hottest crops/users
+    app.config["WARMUP"] = os.environ.get("WARMUP", "1") != "0"
+    app.config["WARMUP_CROPS"] = int(os.environ.get("WARMUP_CROPS", 50))
+
+    # /readyz re-pings MongoDB at most every READY_CHECK_INTERVAL seconds
+    app.config["READY_CHECK_INTERVAL"] = float(os.environ.get("READY_CHECK_INTERVAL", 5))
+    app.config["READY_TIMEOUT"] = float(os.environ.get("READY_TIMEOUT", 1))
+
+    if config:
+        app.config.update(config)
+
+    mongo.init_app(app, connect=False)
+    init_assets(app)
+    app.extensions["bid_queues"] = BidQueues(_commit_bids, max_pending=app.config["BID_QUEUE_MAX_PENDING"])
+    app.extensions["bid_limiters"] = (
+        RateLimiter(app.config["BID_RATE_PER_BIDDER"], app.config["BID_BURST_PER_BIDDER"]),
+        RateLimiter(app.config["BID_RATE_PER_CROP"], app.config["BID_BURST_PER_CROP"])
+    )
+    app.register_blueprint(bp)
 
-mongo = PyMongo()
-app.config["MONGO_URI"] = "mongodb://localhost:27017/crop_connect"
-mongo.init_app(app)
+    steps = []
+    if app.config["WARMUP"]:
+        steps = [_ping_databases, ensure_indexes, lambda: warm_cache(app.config["WARMUP_CROPS"])]
+    init_startup(app, _ping_databases, steps, interval=app.config["READY_CHECK_INTERVAL"])
+    return app
+
+
+def _ping_databases():
+    with pymongo.timeout(current_app.config["READY_TIMEOUT"]):
+        mongo.db.command("ping")
+        db.command("ping")
+
+
+@bp.app_errorhandler(BadRequest)
+@bp.app_errorhandler(RequestEntityTooLarge)
+@bp.app_errorhandler(UnsupportedMediaType)
+def upload_rejected(e):
+    return jsonify({"error": e.description}), e.code
+
+
+# Health and readiness probes
+@bp.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+
+@bp.route("/readyz", methods=["GET"])
+def readyz():
+    report = current_app.extensions["readiness"].report()
+    return jsonify(report), 200 if report["ready"] else 503
 
 
 # Basic routes
-@app.route("/", methods=["GET"])
+@bp.route("/", methods=["GET"])
 def register():
     return render_template("register.html")
 
 
-@app.route("/login", methods=["GET"])
+@bp.route("/login", methods=["GET"])
 def login():
     return render_template("login.html")
 
 
-@app.route("/farmerportal")
+@bp.route("/farmerportal")
 def farmer_portal():
     return render_template("f_portal.html")
 
 
-@app.route("/bidderportal")
+@bp.route("/bidderportal")
 def bidder_portal():
     return render_template("b_portal.html")
 
-@app.route("/wishlist")
+@bp.route("/wishlist")
 def wishlist_page():
     return render_template("wishlist.html")
 
-@app.route('/bid_portal')
+@bp.route('/bid_portal')
 def bid_portal():
     return render_template('bidding/bid_portal.html')
 
@@ -55,7 +139,7 @@ def bid_portal():
 
 
 # Authentication APIs
-@app.route("/api/auth/register", methods=["POST"])
+@bp.route("/api/auth/register", methods=["POST"])
 def register_api():
     data = request.get_json()
     if not data or not all(k in data for k in ("username", "email", "password")):
@@ -73,7 +157,7 @@ def register_api():
     return jsonify({"message": "User registered successfully"}), 201
 
 
-@app.route("/api/auth/login", methods=["POST"])
+@bp.route("/api/auth/login", methods=["POST"])
 def login_api():
     data = request.get_json()
     if not data or not all(k in data for k in ("email", "password")):
@@ -98,7 +182,7 @@ def login_api():
     }), 200
 
 
-@app.route("/api/auth/logout", methods=["POST"])
+@bp.route("/api/auth/logout", methods=["POST"])
 def logout_api():
     session.pop("logged_in_user", None)
     return jsonify({"message": "Logged out"}), 200
@@ -110,7 +194,7 @@ def _is_data_url(s: str):
 
 
 # List crops API filtering by status and expiration
-@app.route("/api/crops", methods=["GET"])
+@bp.route("/api/crops", methods=["GET"])
 def list_crops():
     crops = get_crops()
     now = datetime.utcnow()
@@ -132,7 +216,7 @@ def list_crops():
 
 
 # Add crop API: handle files, data URLs, session farmer info
-@app.route("/api/crops", methods=["POST"])
+@bp.route("/api/crops", methods=["POST"])
 def add_crop():
     if request.is_json:
         data = request.get_json()
@@ -163,20 +247,15 @@ def add_crop():
     data["location"] = data.get("location", "").strip() or "Not specified"
 
     images = []
+    upload_folder = os.path.join(current_app.static_folder, "uploads")
     if request.is_json and data.get("images"):
         if isinstance(data["images"], list):
-            images = [img for img in data["images"] if _is_data_url(img)]
+            images = save_data_urls([img for img in data["images"] if _is_data_url(img)], upload_folder)
         elif _is_data_url(data["images"]):
-            images.append(data["images"])
+            images = save_data_urls([data["images"]], upload_folder)
     else:
-        upload_folder = os.path.join(app.static_folder, "uploads")
-        os.makedirs(upload_folder, exist_ok=True)
         files = request.files.getlist("cropImages") or [request.files.get("cropImage")]
-        for f in files:
-            if f and f.filename != "":
-                path = os.path.join(upload_folder, f.filename)
-                f.save(path)
-                images.append("/" + os.path.relpath(path, start=".").replace("\\", "/"))
+        images = save_uploaded_files(files, upload_folder)
     if not images:
         images = ["/static/default_crop.jpg"]
 
@@ -188,7 +267,7 @@ def add_crop():
 
 
 # Edit crop API supporting both JSON and multipart/form-data for images
-@app.route("/api/crops/<crop_id>", methods=["PUT"])
+@bp.route("/api/crops/<crop_id>", methods=["PUT"])
 def edit_crop(crop_id):
     if request.is_json:
         data = request.get_json()
@@ -208,23 +287,17 @@ def edit_crop(crop_id):
     data["location"] = data.get("location", "").strip() or "Not specified"
 
     new_images = []
+    upload_folder = os.path.join(current_app.static_folder, "uploads")
     if request.is_json and data.get("images"):
         if isinstance(data["images"], list):
-            new_images = [img for img in data["images"] if _is_data_url(img)]
+            new_images = save_data_urls([img for img in data["images"] if _is_data_url(img)], upload_folder)
     else:
         files = request.files.getlist("cropImages")
         if not files:
             single = request.files.get("cropImage")
             if single:
                 files = [single]
-
-        upload_folder = os.path.join(app.static_folder, "uploads")
-        os.makedirs(upload_folder, exist_ok=True)
-        for f in files:
-            if f and f.filename != "":
-                path = os.path.join(upload_folder, f.filename)
-                f.save(path)
-                new_images.append("/" + os.path.relpath(path, start=".").replace("\\", "/"))
+        new_images = save_uploaded_files(files, upload_folder)
 
     if new_images:
         data["images"] = new_images
@@ -247,7 +320,7 @@ def edit_crop(crop_id):
 
 
 # Delete crop API with cascade cleanup (attempt best-effort)
-@app.route("/api/crops/<crop_id>", methods=["DELETE"])
+@bp.route("/api/crops/<crop_id>", methods=["DELETE"])
 def remove_crop(crop_id):
     try:
         crop_oid = ObjectId(crop_id)
@@ -273,8 +346,65 @@ def remove_crop(crop_id):
     return jsonify({"message": "Crop deleted"}), 200
 
 
-# Bidding API with proper ObjectId conversion and validation
-@app.route("/api/bids/<crop_id>", methods=["POST"])
+# Bidding API: admission control, then per-crop queue that coalesces bids
+def _commit_bids(crop_id, batch, attempts=3):
+    """
+    Persist one batch of queued bids for a crop: a single read, a single
+    conditional write for the highest accepted bid and one bulk insert.
+    If another writer changes the crop between the read and the write, the
+    batch is re-evaluated against the fresh document, up to `attempts` times.
+    """
+    crop_oid = ObjectId(crop_id)
+    for _ in range(attempts):
+        crop = mongo.db.crops.find_one({"_id": crop_oid}, {"price": 1, "status": 1})
+        if not crop:
+            return [({"error": "Crop not found"}, 404)] * len(batch)
+        if crop.get("status") in ["closed", "sold"]:
+            return [({"error": "Bidding closed for this crop"}, 400)] * len(batch)
+
+        current_price = float(crop.get("price", 0))
+        accepted = []
+        results = []
+        for bid in batch:
+            if bid.bid_price <= current_price:
+                results.append(({"error": "Bid must be higher than current price"}, 400))
+            else:
+                current_price = bid.bid_price
+                accepted.append(bid)
+                results.append(({"message": "Bid placed successfully!"}, 200))
+        if not accepted:
+            return results
+
+        # only write if the price is still the one we read (a missing price counts as 0)
+        top = accepted[-1]
+        price_filter = crop["price"] if "price" in crop else {"$exists": False}
+        updated = mongo.db.crops.update_one(
+            {"_id": crop_oid, "status": {"$nin": ["closed", "sold"]}, "price": price_filter},
+            {"$set": {"price": top.bid_price, "highest_bidder": top.bidder_id}}
+        )
+        if updated.matched_count == 0:
+            # another writer moved the price or closed the crop under us
+            continue
+
+        mongo.db.bids.insert_many([{
+            "crop_id": crop_oid,
+            "bidder_id": bid.bidder_id,
+            "bid_price": bid.bid_price,
+            "timestamp": bid.timestamp
+        } for bid in accepted])
+        return results
+
+    return [({"error": "Crop is changing too quickly, please retry"}, 409) if r[1] == 200 else r
+            for r in results]
+
+
+def _too_many(message, wait):
+    resp = jsonify({"error": message})
+    resp.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+    return resp, 429
+
+
+@bp.route("/api/bids/<crop_id>", methods=["POST"])
 def place_bid(crop_id):
     try:
         data = request.get_json()
@@ -287,35 +417,28 @@ def place_bid(crop_id):
         bidder_oid = ObjectId(bidder_id)
         bid_price_float = float(bid_price)
 
-        crop = mongo.db.crops.find_one({"_id": crop_oid})
-        if not crop:
-            return jsonify({"error": "Crop not found"}), 404
-
-        if crop.get("status") in ["closed", "sold"]:
-            return jsonify({"error": "Bidding closed for this crop"}), 400
-
-        current_price = float(crop.get("price", 0))
-        if bid_price_float <= current_price:
-            return jsonify({"error": "Bid must be higher than current price"}), 400
-
-        mongo.db.crops.update_one(
-            {"_id": crop_oid},
-            {"$set": {"price": bid_price_float, "highest_bidder": bidder_oid}}
-        )
-        mongo.db.bids.insert_one({
-            "crop_id": crop_oid,
-            "bidder_id": bidder_oid,
-            "bid_price": bid_price_float,
-            "timestamp": datetime.utcnow()
-        })
-        return jsonify({"message": "Bid placed successfully!"}), 200
+        bidder_limiter, crop_limiter = current_app.extensions["bid_limiters"]
+        wait = admit((bidder_limiter, str(bidder_oid)), (crop_limiter, str(crop_oid)))
+        if wait:
+            return _too_many("Too many bids, please retry shortly", wait)
+
+        bid = PendingBid(bidder_oid, bid_price_float)
+        if current_app.config["BID_COALESCE"]:
+            result = current_app.extensions["bid_queues"].submit(str(crop_oid), bid)
+        else:
+            # one read/write per bid, no queue: the baseline for load tests
+            result = _commit_bids(str(crop_oid), [bid])[0]
+        if result is None:
+            return _too_many("Bid queue is full, please retry shortly", 1)
+        payload, status = result
+        return jsonify(payload), status
     except Exception as e:
         print("Error placing bid:", e)
         return jsonify({"error": "Internal Server Error"}), 500
 
 
 # Wishlist APIs
-@app.route("/api/wishlist/<user_id>", methods=["GET"])
+@bp.route("/api/wishlist/<user_id>", methods=["GET"])
 def get_wishlist(user_id):
     wishlist = db.wishlist.find({"user_id": ObjectId(user_id)})
     result = []
@@ -327,7 +450,7 @@ def get_wishlist(user_id):
     return jsonify(result), 200
 
 
-@app.route("/api/wishlist", methods=["POST"])
+@bp.route("/api/wishlist", methods=["POST"])
 def add_to_wishlist():
     data = request.get_json()
     if not data:
@@ -349,7 +472,7 @@ def add_to_wishlist():
 
 
 # Auction winner API
-@app.route("/api/auction/winner/<crop_id>", methods=["GET"])
+@bp.route("/api/auction/winner/<crop_id>", methods=["GET"])
 def auction_winner(crop_id):
     winner = get_auction_winner(crop_id)
     if winner:
@@ -359,7 +482,7 @@ def auction_winner(crop_id):
 
 
 # Chat system APIs
-@app.route("/api/messages/<crop_id>", methods=["GET"])
+@bp.route("/api/messages/<crop_id>", methods=["GET"])
 def get_messages(crop_id):
     try:
         crop_oid = ObjectId(crop_id)
@@ -389,7 +512,7 @@ def get_messages(crop_id):
     return jsonify(out), 200
 
 
-@app.route("/api/messages", methods=["POST"])
+@bp.route("/api/messages", methods=["POST"])
 def send_message():
     data = request.get_json()
     required = ["crop_id", "sender_id", "receiver_id", "message"]
@@ -410,7 +533,7 @@ def send_message():
 
 
 # Chat page render with permissions
-@app.route("/chat")
+@bp.route("/chat")
 def chat():
     crop_id = request.args.get("crop_id")
     if not crop_id:
@@ -455,4 +578,4 @@ def chat():
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
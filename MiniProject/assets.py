@@ -0,0 +1,152 @@
+# assets.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from flask import request, send_file, abort
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Only text-like assets are worth compressing; images are already compressed.
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".html", ".txt", ".map"}
+MIN_COMPRESS_SIZE = 512
+SKIP_DIRS = {"uploads"}  # user uploads change at runtime, serve them as-is
+
+
+class AssetPipeline:
+    """
+    Built once at startup: fingerprints every file under the static folder by
+    content hash and pre-generates .gz/.br variants in the instance folder.
+    """
+
+    def __init__(self, app):
+        self.static_folder = app.static_folder
+        self.build_folder = os.path.join(app.instance_path, "assets")
+        self.max_age = app.config.get("ASSETS_MAX_AGE", 31536000)
+        self.manifest = {}   # "b_portal.css" -> "b_portal.1a2b3c4d.css"
+        self.sources = {}    # "b_portal.1a2b3c4d.css" -> "b_portal.css"
+        self.variants = {}   # "b_portal.css" -> {"br": path, "gzip": path}
+        self.digests = {}    # "b_portal.css" -> "1a2b3c4d..."
+
+    def build(self):
+        os.makedirs(self.build_folder, exist_ok=True)
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.static_folder).replace("\\", "/")
+                with open(path, "rb") as f:
+                    body = f.read()
+                digest = hashlib.sha256(body).hexdigest()[:12]
+                stem, ext = os.path.splitext(rel)
+                hashed = "%s.%s%s" % (stem, digest, ext)
+                self.manifest[rel] = hashed
+                self.sources[hashed] = rel
+                self.digests[rel] = digest
+                if ext.lower() in COMPRESSIBLE and len(body) >= MIN_COMPRESS_SIZE:
+                    self.variants[rel] = self._compress(hashed, body)
+        return self
+
+    def _compress(self, hashed, body):
+        out = {}
+        encoders = [("gzip", ".gz", lambda b: gzip.compress(b, 9, mtime=0))]
+        if brotli is not None:
+            encoders.insert(0, ("br", ".br", lambda b: brotli.compress(b, quality=11)))
+        for encoding, suffix, encode in encoders:
+            target = os.path.join(self.build_folder, hashed.replace("/", "_") + suffix)
+            if not os.path.exists(target):
+                data = encode(body)
+                if len(data) >= len(body):
+                    continue
+                self._write(target, data)
+            out[encoding] = target
+        return out
+
+    def _write(self, target, data):
+        """
+        Atomically publish `data` at `target`. Every worker may build at the
+        same time, so each writes its own temp file; identical content means
+        whichever replace lands last is as good as the first.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.build_folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            if not os.path.exists(target):
+                raise
+
+    def url_defaults(self, endpoint, values):
+        if endpoint == "static" and values.get("filename") in self.manifest:
+            values["filename"] = self.manifest[values["filename"]]
+
+    def serve(self, filename):
+        rel = self.sources.get(filename)
+        immutable = rel is not None
+        rel = rel or filename
+        path = os.path.realpath(os.path.join(self.static_folder, rel))
+        if not path.startswith(os.path.realpath(self.static_folder) + os.sep) or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        encoding = None
+        variants = self.variants.get(rel)
+        if variants and "Range" not in request.headers:
+            accepted = request.accept_encodings
+            for candidate in ("br", "gzip"):
+                if candidate in variants and accepted[candidate]:
+                    encoding = candidate
+                    path = variants[candidate]
+                    break
+
+        # each representation gets its own ETag so a later identity Range
+        # request never validates against the compressed body
+        etag = True
+        if rel in self.digests:
+            etag = self.digests[rel] + ("-" + encoding if encoding else "")
+        resp = send_file(path, mimetype=mimetype, conditional=True, etag=etag,
+                         download_name=os.path.basename(filename),
+                         max_age=self.max_age if immutable else None)
+        if variants:
+            resp.vary.add("Accept-Encoding")
+        if encoding:
+            resp.content_encoding = encoding
+            resp.headers.pop("Accept-Ranges", None)
+        if immutable:
+            resp.cache_control.public = True
+            resp.cache_control.immutable = True
+        return resp
+
+
+def compress_json(response, min_size=1024):
+    """
+    after_request hook: gzip large JSON API responses on the fly.
+    """
+    if (response.mimetype != "application/json" or response.status_code != 200
+            or response.direct_passthrough or "Content-Encoding" in response.headers
+            or not request.accept_encodings["gzip"]):
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    response.set_data(gzip.compress(body, 6))
+    response.content_encoding = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_assets(app):
+    pipeline = AssetPipeline(app).build()
+    app.url_default_functions.setdefault(None, []).append(pipeline.url_defaults)
+    app.view_functions["static"] = pipeline.serve
+    app.after_request(compress_json)
+    app.extensions["assets"] = pipeline
+    return pipeline
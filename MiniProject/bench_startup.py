@@ -0,0 +1,46 @@
+# bench_startup.py
+"""
+Cold-start benchmark. Each run uses a fresh interpreter, so nothing is cached
+between samples, and times `import app` and `create_app()` separately.
+
+    python bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app({"WARMUP": False})
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = {"import": [], "create_app": []}
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=here, check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        for key, value in result.items():
+            samples[key].append(value * 1000)
+
+    for key, values in samples.items():
+        print("%-11s median=%7.1fms min=%7.1fms max=%7.1fms" % (
+            key, statistics.median(values), min(values), max(values)))
+
+
+if __name__ == "__main__":
+    main()
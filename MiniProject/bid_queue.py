@@ -0,0 +1,95 @@
+# bid_queue.py
+import threading
+from datetime import datetime
+
+
+class PendingBid:
+    def __init__(self, bidder_id, bid_price):
+        self.bidder_id = bidder_id
+        self.bid_price = bid_price
+        self.timestamp = datetime.utcnow()
+        self.result = None
+
+
+class CropBidQueue:
+    """
+    Serializes bids for a single crop. Whichever request finds the queue idle
+    becomes the flusher: it drains everything pending into one batch and hands
+    it to `commit`, so bids arriving while a flush is in flight are coalesced
+    into the next batch instead of each doing its own read/write.
+    """
+
+    def __init__(self, crop_id, commit, max_pending):
+        self.crop_id = crop_id
+        self.commit = commit
+        self.max_pending = max_pending
+        self.pending = []
+        self.flushing = False
+        self.cond = threading.Condition()
+
+    def submit(self, bid):
+        """
+        Block until `bid` has been committed. Returns the (payload, status)
+        pair produced by `commit`, or None if the queue is full.
+        """
+        with self.cond:
+            if len(self.pending) >= self.max_pending:
+                return None
+            self.pending.append(bid)
+
+            while bid.result is None:
+                if self.flushing:
+                    self.cond.wait()
+                    continue
+
+                self.flushing = True
+                batch, self.pending = self.pending, []
+                self.cond.release()
+                try:
+                    results = self._run(batch)
+                finally:
+                    self.cond.acquire()
+                    self.flushing = False
+                for b, r in zip(batch, results):
+                    b.result = r
+                self.cond.notify_all()
+        return bid.result
+
+    def _run(self, batch):
+        try:
+            results = list(self.commit(self.crop_id, batch))
+        except Exception as e:
+            print("Error committing bids:", e)
+            results = []
+        error = ({"error": "Internal Server Error"}, 500)
+        return results + [error] * (len(batch) - len(results))
+
+
+class BidQueues:
+    """
+    Registry of per-crop queues. A queue only lives while some request is
+    using it: the last submitter to leave removes it, so bids aimed at
+    arbitrary crop ids cannot grow the registry.
+    """
+
+    def __init__(self, commit, max_pending=64):
+        self.commit = commit
+        self.max_pending = max_pending
+        self._queues = {}
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def submit(self, crop_id, bid):
+        with self._lock:
+            queue = self._queues.get(crop_id)
+            if queue is None:
+                queue = self._queues[crop_id] = CropBidQueue(crop_id, self.commit, self.max_pending)
+            self._users[crop_id] = self._users.get(crop_id, 0) + 1
+        try:
+            return queue.submit(bid)
+        finally:
+            with self._lock:
+                self._users[crop_id] -= 1
+                if not self._users[crop_id]:
+                    del self._users[crop_id]
+                    del self._queues[crop_id]
@@ -4,13 +4,37 @@ from datetime import datetime
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+import threading
 
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("DB_NAME", "crop_db")
+_client = None
+_database = None
+_lock = threading.Lock()
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+
+def get_db():
+    """
+    Connect on first use rather than at import, so importing this module
+    never reads .env or waits on MongoDB.
+    """
+    global _client, _database
+    if _database is None:
+        with _lock:
+            if _database is None:
+                load_dotenv()
+                _client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), connect=False)
+                _database = _client[os.getenv("DB_NAME", "crop_db")]
+    return _database
+
+
+class _LazyDatabase:
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = _LazyDatabase()
 
 # -------------------- USERS --------------------
 
@@ -258,3 +282,22 @@ def ensure_indexes():
         db.chats.create_index([("crop_id", 1), ("timestamp", 1)])
     except Exception as e:
         print("Index creation failed:", e)
+
+
+def warm_cache(limit=50):
+    """
+    Touch the most recent crops and their farmers so the connection pool and
+    MongoDB's working set are hot before real traffic arrives.
+    """
+    crops = list(db.crops.find({}, {"farmer_id": 1}).sort("datetime", -1).limit(limit))
+    farmer_ids = []
+    for c in crops:
+        if not c.get("farmer_id"):
+            continue
+        try:
+            farmer_ids.append(ObjectId(c["farmer_id"]))
+        except Exception:
+            pass
+    if farmer_ids:
+        list(db.users.find({"_id": {"$in": farmer_ids}}, {"username": 1}))
+    return len(crops)
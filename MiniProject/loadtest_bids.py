@@ -0,0 +1,92 @@
+# loadtest_bids.py
+"""
+Bid storm load test. Fires concurrent bids at one crop while sampling the
+latency of other routes, then prints p50/p99 for each.
+
+    python loadtest_bids.py --crop <crop_id> --bidders <id1,id2,...>
+
+For a before/after comparison, run it once against a server started with
+the baseline behaviour (no queue, effectively no rate limits):
+
+    BID_COALESCE=0 BID_RATE_PER_BIDDER=1e9 BID_BURST_PER_BIDDER=1e9 \
+    BID_RATE_PER_CROP=1e9 BID_BURST_PER_CROP=1e9 python app.py
+
+and once against a server with the default BID_* settings.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def _request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base", default="http://127.0.0.1:5000")
+    parser.add_argument("--crop", required=True)
+    parser.add_argument("--bidders", required=True, help="comma separated bidder ids")
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--start-price", type=float, default=1.0)
+    args = parser.parse_args()
+
+    bidders = args.bidders.split(",")
+    deadline = time.monotonic() + args.duration
+    price = [args.start_price]
+    lock = threading.Lock()
+    bid_stats, other_stats = [], []
+
+    def storm(n):
+        while time.monotonic() < deadline:
+            with lock:
+                price[0] += 1
+                bid = price[0]
+            body = {"bidder_id": bidders[n % len(bidders)], "bid_price": bid}
+            bid_stats.append(_request("%s/api/bids/%s" % (args.base, args.crop), body))
+
+    def browse():
+        while time.monotonic() < deadline:
+            other_stats.append(_request("%s/api/crops" % args.base))
+            time.sleep(0.05)
+
+    workers = [threading.Thread(target=storm, args=(i,)) for i in range(args.threads)]
+    workers.append(threading.Thread(target=browse))
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    for name, stats in (("POST /api/bids", bid_stats), ("GET /api/crops", other_stats)):
+        latencies = [lat * 1000 for _, lat in stats]
+        codes = {}
+        for status, _ in stats:
+            codes[status] = codes.get(status, 0) + 1
+        print("%-16s n=%-6d p50=%7.1fms p99=%7.1fms statuses=%s" % (
+            name, len(stats), _percentile(latencies, 50), _percentile(latencies, 99), codes))
+
+
+if __name__ == "__main__":
+    main()
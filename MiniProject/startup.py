@@ -0,0 +1,106 @@
+# startup.py
+import threading
+import time
+
+
+class Readiness:
+    """
+    Tracks background warmup and re-checks the database so /readyz keeps
+    reporting the truth after startup. `check` should be cheap and bounded
+    (a ping with a short timeout); its result is cached for `interval` seconds.
+    """
+
+    def __init__(self, check, interval=5.0):
+        self.check = check
+        self.interval = interval
+        self.created = time.monotonic()
+        self.warm = False
+        self.error = None
+        self.attempts = 0
+        self.warmup_seconds = None
+        self._checked_at = None
+        self._check_ok = False
+        self._lock = threading.Lock()
+
+    def is_ready(self):
+        if not self.warm:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.interval:
+                try:
+                    self.check()
+                    self._check_ok = True
+                    self.error = None
+                except Exception as e:
+                    self._check_ok = False
+                    self.error = str(e)
+                self._checked_at = now
+            return self._check_ok
+
+    def report(self):
+        ready = self.is_ready()
+        return {
+            "ready": ready,
+            "warm": self.warm,
+            "attempts": self.attempts,
+            "error": self.error,
+            "warmup_seconds": self.warmup_seconds,
+            "uptime_seconds": round(time.monotonic() - self.created, 3)
+        }
+
+
+def start_warmup(app, steps, retry_delay=5):
+    """
+    Run `steps` in a daemon thread inside an app context, retrying until they
+    all succeed, then mark the app warm.
+    """
+    readiness = app.extensions["readiness"]
+
+    def run():
+        with app.app_context():
+            while True:
+                readiness.attempts += 1
+                started = time.monotonic()
+                try:
+                    for step in steps:
+                        step()
+                except Exception as e:
+                    readiness.error = str(e)
+                    print("Warmup failed, retrying:", e)
+                    time.sleep(retry_delay)
+                    continue
+                readiness.error = None
+                readiness.warmup_seconds = round(time.monotonic() - started, 3)
+                readiness.warm = True
+                return
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def init_startup(app, check, steps, interval=5.0):
+    """
+    Attach readiness tracking to `app` and start warmup on the first request.
+    Deferring to the first request means warmup runs after the server has
+    bound, in the process that actually serves (so it survives pre-fork
+    servers such as gunicorn --preload). A readiness probe counts as a request.
+    """
+    readiness = app.extensions["readiness"] = Readiness(check, interval)
+    if not steps:
+        readiness.warm = True
+        return readiness
+
+    lock = threading.Lock()
+    started = []
+
+    @app.before_request
+    def _start_warmup():
+        if started:
+            return
+        with lock:
+            if not started:
+                started.append(start_warmup(app, steps))
+
+    return readiness
@@ -0,0 +1,151 @@
+# uploads.py
+import base64
+import binascii
+import os
+import shutil
+import tempfile
+import uuid
+
+from flask import Request, current_app
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+SNIFF_BYTES = 12
+CHUNK_SIZE = 64 * 1024  # multiple of 4, so base64 chunks decode independently
+
+IMAGE_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "gif": ".gif", "webp": ".webp"}
+
+
+def sniff_image(head):
+    """
+    Identify an image from its first bytes. Returns None for anything else.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+class ImageSink:
+    """
+    Write-only temporary file for one uploaded image. Rejects the upload as
+    soon as it grows past `max_bytes` or its first bytes are not an image,
+    so nothing larger than one chunk is ever held in memory.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.file = tempfile.TemporaryFile()
+        self.size = 0
+        self.head = b""
+        self.kind = None
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.file.close()
+            raise RequestEntityTooLarge("Image exceeds %d bytes" % self.max_bytes)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._sniff()
+        return self.file.write(chunk)
+
+    def _sniff(self):
+        self.kind = sniff_image(self.head)
+        if not self.kind:
+            self.file.close()
+            raise UnsupportedMediaType("Only JPEG, PNG, GIF or WebP images are accepted")
+
+    def finish(self):
+        if not self.size:
+            self.file.close()
+            raise BadRequest("Empty image upload")
+        if not self.kind:
+            self._sniff()
+        self.file.seek(0)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class UploadRequest(Request):
+    """
+    Request class that streams file parts into ImageSinks and caps the number
+    of files per request. Total body size is capped by MAX_CONTENT_LENGTH.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename:
+            self._upload_count = getattr(self, "_upload_count", 0) + 1
+            if self._upload_count > current_app.config["MAX_UPLOAD_FILES"]:
+                raise RequestEntityTooLarge("Too many files in one request")
+        return ImageSink(current_app.config["MAX_UPLOAD_FILE_SIZE"])
+
+
+def _store(sinks, folder):
+    """
+    Validate every sink before writing any of them into `folder`, naming each
+    file from its sniffed type rather than anything the client sent. On error
+    nothing written by this call is left behind.
+    """
+    paths = []
+    try:
+        for sink in sinks:
+            sink.finish()
+        os.makedirs(folder, exist_ok=True)
+        for sink in sinks:
+            path = os.path.join(folder, uuid.uuid4().hex + IMAGE_EXTENSIONS[sink.kind])
+            paths.append(path)
+            with open(path, "wb") as out:
+                shutil.copyfileobj(sink, out, CHUNK_SIZE)
+    except Exception:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+    finally:
+        for sink in sinks:
+            sink.close()
+    return ["/" + os.path.relpath(path, start=".").replace("\\", "/") for path in paths]
+
+
+def save_uploaded_files(files, folder):
+    """
+    Move already-streamed multipart images into `folder`; returns their URLs.
+    """
+    return _store([f.stream for f in files if f and f.filename], folder)
+
+
+def decode_data_url(data_url):
+    """
+    Decode a base64 image data URL chunk by chunk into an ImageSink.
+    """
+    header, sep, payload = data_url.partition(",")
+    if not sep or ";base64" not in header or not header[5:].startswith("image/"):
+        raise UnsupportedMediaType("Only base64 image data URLs are accepted")
+
+    sink = ImageSink(current_app.config["MAX_UPLOAD_FILE_SIZE"])
+    try:
+        for start in range(0, len(payload), CHUNK_SIZE):
+            sink.write(base64.b64decode(payload[start:start + CHUNK_SIZE], validate=True))
+    except (binascii.Error, ValueError):
+        sink.close()
+        raise BadRequest("Malformed image data URL")
+    return sink
+
+
+def save_data_urls(data_urls, folder):
+    """
+    Validate every data URL before writing any of them into `folder`.
+    """
+    if len(data_urls) > current_app.config["MAX_UPLOAD_FILES"]:
+        raise RequestEntityTooLarge("Too many files in one request")
+    return _store([decode_data_url(d) for d in data_urls], folder)